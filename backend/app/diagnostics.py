@@ -0,0 +1,267 @@
+# backend/app/diagnostics.py
+"""
+Startup-time and memory profile for the backend.
+
+Run from the backend/ directory:
+    python -m app.diagnostics                # JSON report on stdout
+    python -m app.diagnostics -o report.json --warm-runs 20
+
+The report covers import time per module, RSS growth attributed to each
+module that loads a model/KB as an import side effect, tracemalloc top
+allocators during a synthetic request, and cold vs warm latency per endpoint.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPORT_VERSION = 1
+
+# Imported in this order so each step is charged only for what it adds
+PROFILED_MODULES = [
+    ("app.schemas", "pydantic schemas"),
+    ("app.db", "SQLAlchemy engine + create_all"),
+    ("app.services.dose_rules", "dose rules table"),
+    ("app.services.interactions", "interaction KB (mock_interactions.json)"),
+    ("app.services.allergies", "allergy class index (allergy_classes.json)"),
+    ("app.services.extract", "transformers NER pipeline"),
+    ("app.services.ocr", "torch + Granite Vision pipeline"),
+    ("app.main", "FastAPI app"),
+]
+
+DIAG_PATIENT = "__diagnostics__"
+SAMPLE_TEXT = "Tab Amoxicillin 500 mg BD\nParacetamol 650mg TDS\nWarfarin 5 mg OD\n"
+SAMPLE_PAYLOAD = {
+    "patient": {"name": DIAG_PATIENT, "age_years": 70, "weight_kg": 55, "egfr": 50,
+                "allergies": ["Penicillin"]},
+    "meds": [
+        {"raw": "Amoxicillin 500 mg BD", "drug": "Amoxicillin", "strength": 500, "unit": "mg",
+         "frequency_per_day": 2},
+        {"raw": "Warfarin 5 mg OD", "drug": "Warfarin", "strength": 5, "unit": "mg",
+         "frequency_per_day": 1},
+    ],
+}
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def rss_bytes():
+    """Current resident set size, or None if it can't be read here."""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def rss_mb():
+    rss = rss_bytes()
+    return round(rss / 2**20, 2) if rss is not None else None
+
+
+def import_time_summary(target="app.main", top=15):
+    """
+    Run `python -X importtime -c 'import <target>'` in a fresh interpreter and
+    summarize cumulative time per top-level package and per app module.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, cwd=os.getcwd(),
+    )
+    by_package = defaultdict(int)
+    app_modules = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        depth = (len(indent) - 1) // 2
+        if depth == 0:
+            # top-level entries already include everything they pulled in
+            by_package[name.split(".")[0]] += cumulative_us
+        if name == "app" or name.startswith("app."):
+            app_modules[name] = {"self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+    packages = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)
+    error = None
+    if proc.returncode:
+        stderr_lines = proc.stderr.strip().splitlines()
+        error = stderr_lines[-1] if stderr_lines else f"exit code {proc.returncode}"
+    return {
+        "target": target,
+        "ok": proc.returncode == 0,
+        "error": error,
+        "total_ms": sum(by_package.values()) / 1000,
+        "top_packages": [{"package": p, "cumulative_ms": us / 1000} for p, us in packages[:top]],
+        "app_modules": app_modules,
+    }
+
+
+def profile_module_loads():
+    """Import each profiled module in turn, recording wall time and RSS growth."""
+    results = []
+    for name, what in PROFILED_MODULES:
+        already = name in sys.modules
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        error = None
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        rss_after = rss_bytes()
+        results.append({
+            "module": name,
+            "loads": what,
+            "already_imported": already,
+            "import_ms": round(elapsed * 1000, 2),
+            "rss_delta_mb": (round((rss_after - rss_before) / 2**20, 2)
+                             if rss_before is not None and rss_after is not None else None),
+            "error": error,
+        })
+    return results
+
+
+def _endpoint_calls(main):
+    """Synthetic calls to each route handler, keyed by endpoint."""
+    return {
+        "POST /extract": lambda: asyncio.run(main.route_extract(file=None, text=SAMPLE_TEXT)),
+        "POST /analyze": lambda: asyncio.run(main.route_analyze(SAMPLE_PAYLOAD)),
+        "GET /history/{patient_name}": lambda: main.get_patient_history(DIAG_PATIENT, limit=50, offset=0),
+        "GET /history": lambda: main.list_history(limit=50, offset=0),
+    }
+
+
+def trace_request(main, top=15):
+    """tracemalloc top allocators (by line) over one pass of synthetic requests."""
+    errors = {}
+    tracemalloc.start(10)
+    try:
+        for endpoint, call in _endpoint_calls(main).items():
+            try:
+                call()
+            except Exception as e:
+                errors[endpoint] = f"{type(e).__name__}: {e}"
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    return {
+        "current_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top_allocators": [{
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        } for stat in snapshot.statistics("lineno")[:top]],
+        "errors": errors,
+    }
+
+
+def endpoint_latency(main, warm_runs=10):
+    """First call per endpoint is reported as cold, the rest as warm."""
+    results = {}
+    for endpoint, call in _endpoint_calls(main).items():
+        timings = []
+        error = None
+        for _ in range(warm_runs + 1):
+            start = time.perf_counter()
+            try:
+                call()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                break
+            timings.append((time.perf_counter() - start) * 1000)
+        warm = timings[1:]
+        results[endpoint] = {
+            "cold_ms": round(timings[0], 3) if timings else None,
+            "warm_median_ms": round(statistics.median(warm), 3) if warm else None,
+            "warm_p95_ms": round(sorted(warm)[int(0.95 * (len(warm) - 1))], 3) if warm else None,
+            "warm_runs": len(warm),
+            "error": error,
+        }
+    return results
+
+
+def cleanup_history():
+    """Drop the history rows written by the synthetic /analyze calls."""
+    from app.db import SessionLocal, PrescriptionHistory
+    db = SessionLocal()
+    try:
+        db.query(PrescriptionHistory).filter(PrescriptionHistory.patient_name == DIAG_PATIENT).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_report(warm_runs=10, top=15, skip_importtime=False):
+    report = {
+        "report_version": REPORT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rss_baseline_mb": rss_mb(),
+    }
+    if not skip_importtime:
+        report["import_time"] = import_time_summary(top=top)
+    report["module_loads"] = profile_module_loads()
+    report["rss_after_startup_mb"] = rss_mb()
+
+    main = sys.modules.get("app.main")
+    if main is None:
+        report["error"] = "app.main failed to import; request profiling skipped"
+        return report
+    try:
+        report["endpoint_latency"] = endpoint_latency(main, warm_runs=warm_runs)
+        report["request_allocations"] = trace_request(main, top=top)
+    finally:
+        try:
+            cleanup_history()
+        except Exception as e:
+            report["cleanup_error"] = f"{type(e).__name__}: {e}"
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backend startup-time and memory profile report.")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--warm-runs", type=int, default=10, help="warm calls per endpoint")
+    parser.add_argument("--top", type=int, default=15, help="entries kept in top-N lists")
+    parser.add_argument("--skip-importtime", action="store_true",
+                        help="skip the -X importtime subprocess (it loads all models twice)")
+    args = parser.parse_args(argv)
+
+    report = build_report(warm_runs=args.warm_runs, top=args.top, skip_importtime=args.skip_importtime)
+    out = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 import logging
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.services import ocr, extract, interactions
+from app.services import ocr, extract, interactions, allergies
 from app.schemas import ExtractionResponse, ValidationResult, MedLine, PatientContext
 from typing import List
 import io
@@ -108,10 +108,13 @@ async def route_analyze(payload: dict):
         except Exception as e:
             log.warning("Dose check helper failed: %s", e)
 
-    # 3) Alternatives
+    # 3) Allergy / cross-reactivity screening
+    allergy_issues = allergies.screen_allergies(meds, patient.allergies)
+
+    # 4) Alternatives
     alts = interactions.suggest_alternatives_for_flagged(meds, inter, patient.dict())
 
-    # 4) Save to DB
+    # 5) Save to DB
     db = SessionLocal()
     try:
         record = PrescriptionHistory(
@@ -133,17 +136,19 @@ async def route_analyze(payload: dict):
     finally:
         db.close()
 
-    return ValidationResult(dose_issues=dose_issues, interactions=inter, alternatives=alts)
+    return ValidationResult(dose_issues=dose_issues, allergy_issues=allergy_issues,
+                            interactions=inter, alternatives=alts)
 
 
 @app.get("/history/{patient_name}")
-def get_patient_history(patient_name: str, limit: int = 50):
+def get_patient_history(patient_name: str, limit: int = 50, offset: int = 0):
     """
     Returns recent analysis records for a given patient_name (case-insensitive).
+    Use offset/limit to page through long histories.
     """
     db = SessionLocal()
     try:
-        q = db.query(PrescriptionHistory).filter(PrescriptionHistory.patient_name.ilike(f"%{patient_name}%")).order_by(PrescriptionHistory.created_at.desc()).limit(limit)
+        q = db.query(PrescriptionHistory).filter(PrescriptionHistory.patient_name.ilike(f"%{patient_name}%")).order_by(PrescriptionHistory.created_at.desc()).offset(offset).limit(limit)
         results = []
         for r in q:
             results.append({
@@ -165,11 +170,11 @@ def get_patient_history(patient_name: str, limit: int = 50):
 
 
 @app.get("/history")
-def list_history(limit: int = 50):
+def list_history(limit: int = 50, offset: int = 0):
     """List recent analyses across all patients"""
     db = SessionLocal()
     try:
-        q = db.query(PrescriptionHistory).order_by(PrescriptionHistory.created_at.desc()).limit(limit)
+        q = db.query(PrescriptionHistory).order_by(PrescriptionHistory.created_at.desc()).offset(offset).limit(limit)
         return [{
             "id": r.id,
             "date": r.created_at.isoformat(),
@@ -16,12 +16,14 @@ class MedLine(BaseModel):
     strength: Optional[float] = None
     unit: Optional[str] = None
     frequency: Optional[str] = None
+    frequency_per_day: Optional[int] = None
     duration_days: Optional[int] = None
     route: Optional[str] = None
     confidence: Optional[float] = 1.0
 
 class ExtractionResponse(BaseModel):
     meds: List[MedLine]
+    error: Optional[str] = None
 
 class InteractionPair(BaseModel):
     a_rxcui: str
@@ -32,5 +34,6 @@ class InteractionPair(BaseModel):
 
 class ValidationResult(BaseModel):
     dose_issues: List[Any] = []
+    allergy_issues: List[Any] = []
     interactions: List[InteractionPair] = []
     alternatives: List[MedLine] = []
@@ -0,0 +1,193 @@
+# backend/app/services/allergies.py
+import json
+import os
+import re
+from typing import List, Dict, Any, Iterable, FrozenSet
+from app.schemas import MedLine
+import logging
+
+log = logging.getLogger("allergies")
+
+HERE = os.path.dirname(__file__)
+DATA_PATH = os.path.join(HERE, "..", "data", "allergy_classes.json")
+
+# Unlike the interaction KB this is not optional: an empty KB would silently
+# clear every prescription, so a missing or corrupt file fails startup.
+try:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        ALLERGY_KB = json.load(f)
+except Exception:
+    log.exception("Failed to load allergy KB from %s", DATA_PATH)
+    raise
+
+# Cross-reactivity risk -> issue level
+CROSS_RISK_LEVEL = {"high": "high", "moderate": "warning", "low": "info"}
+
+TOKEN_RE = re.compile(r"[a-z]+")
+PAREN_RE = re.compile(r"\([^)]*\)")
+
+# Words patients/clinicians add around an allergen ("penicillin allergy (rash)")
+ALLERGY_NOISE_WORDS = {
+    "allergy", "allergies", "allergic", "to", "and", "rash", "hives", "itching", "swelling",
+    "reaction", "anaphylaxis", "intolerance", "mild", "moderate", "severe", "history", "of",
+}
+
+# Dosage-form words stripped from a med name before literal matching ("Tab Paracetamol")
+FORM_WORDS = {
+    "tab", "tabs", "tablet", "tablets", "cap", "caps", "capsule", "capsules", "syp", "syrup",
+    "inj", "injection", "susp", "suspension", "oint", "ointment", "drops",
+}
+
+
+def _build_index(kb: Dict[str, Any]):
+    """
+    Precompute the drug -> ingredient -> allergen class chain into flat lookups:
+    name_classes:    drug or ingredient name -> allergen classes it belongs to
+    allergen_classes: anything a patient may list as an allergy -> classes
+                      (umbrella groups such as beta-lactams map to several)
+    cross_reactive:  class -> {cross-reactive class: risk}
+    """
+    classes = kb.get("classes", {})
+    ingredients = kb.get("ingredients", {})
+    name_classes = {name.lower(): frozenset(cls) for name, cls in ingredients.items()}
+    for drug, ingr in kb.get("drugs", {}).items():
+        name_classes[drug.lower()] = frozenset(c for i in ingr for c in ingredients.get(i, []))
+
+    allergen_classes = dict(name_classes)
+    for key, info in classes.items():
+        for alias in [key, key.replace("_", " ")] + info.get("aliases", []):
+            allergen_classes[alias.lower()] = frozenset([key])
+    for key, info in kb.get("groups", {}).items():
+        members = frozenset(c for c in info.get("classes", []) if c in classes)
+        for alias in [key, key.replace("_", " ")] + info.get("aliases", []):
+            allergen_classes[alias.lower()] = members
+
+    cross_reactive = {key: dict(info.get("cross_reactive", {})) for key, info in classes.items()}
+    labels = {key: info.get("label", key) for key, info in classes.items()}
+    return name_classes, allergen_classes, cross_reactive, labels
+
+
+NAME_CLASSES, ALLERGEN_CLASSES, CROSS_REACTIVE, CLASS_LABELS = _build_index(ALLERGY_KB)
+
+
+def _words(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _names(text: str) -> List[str]:
+    """
+    Whole lowered name first (so KB keys like co-amoxiclav match), then adjacent
+    word pairs, then single words. Hyphens split words: "amoxicillin-clavulanate"
+    -> amoxicillin, clavulanate; "beta lactam allergy" -> beta lactam.
+    """
+    text = (text or "").strip().lower()
+    if not text:
+        return []
+    words = _words(text)
+    pairs = [f"{a}{sep}{b}" for a, b in zip(words, words[1:]) for sep in (" ", "-")]
+    return [text] + pairs + words
+
+
+def _classes(names: Iterable[str], index: Dict[str, FrozenSet[str]]) -> FrozenSet[str]:
+    """Union over every name, so combination products are screened per ingredient."""
+    return frozenset(c for n in names for c in index.get(n, ()))
+
+
+def allergen_classes(allergy: str) -> FrozenSet[str]:
+    return _classes(_names(allergy), ALLERGEN_CLASSES)
+
+
+def med_classes(name: str) -> FrozenSet[str]:
+    return _classes(_names(name), NAME_CLASSES)
+
+
+def _literal_keys(allergy: str) -> List[str]:
+    """
+    Literal-match keys for an allergy the KB doesn't know: the whole string, the
+    string without filler words, and multi-word spans. Never lone words, so
+    "peanut oil" can't match Castor oil.
+    """
+    # bracketed text describes the reaction, not the allergen: "Lisinopril (cough)"
+    words = [w for w in _words(PAREN_RE.sub(" ", allergy)) if w not in ALLERGY_NOISE_WORDS]
+    keys = [allergy.strip().lower(), " ".join(words)]
+    keys += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [k for k in keys if k]
+
+
+def _literal_candidates(drug: str) -> List[str]:
+    """Whole med name, the name without dosage-form words, and its word pairs."""
+    words = _words(drug)
+    core = [w for w in words if w not in FORM_WORDS]
+    return [drug.strip().lower(), " ".join(core)] + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def screen_allergies(meds: List[MedLine], allergies: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Flag meds that hit a listed allergy directly or through a cross-reactive class.
+    Cost is O(meds + allergies): allergies are folded into class sets once, then
+    each med is a few dict lookups plus small set intersections. Allergies the KB
+    doesn't recognise are matched on drug name only (as warnings); if that finds
+    nothing they are reported as info issues so the clinician knows.
+    """
+    allergic = {}     # class -> allergy as the patient listed it
+    literal = {}      # whole-name keys of unrecognised allergies -> allergy
+    for a in allergies or []:
+        a = (a or "").strip()
+        if not a:
+            continue
+        hit = allergen_classes(a)
+        if hit:
+            for c in hit:
+                allergic.setdefault(c, a)
+            continue
+        for k in _literal_keys(a):
+            literal.setdefault(k, a)
+
+    cross = {}        # class -> (allergy class it cross-reacts with, risk)
+    for c in allergic:
+        for other, risk in CROSS_REACTIVE.get(c, {}).items():
+            if other not in allergic:
+                cross.setdefault(other, (c, risk))
+
+    issues = []
+    seen = set()
+    literal_hits = set()
+    for m in meds:
+        drug = m.drug or m.raw
+        names = _names(drug)
+        if not names:
+            continue
+        # the same drug on several lines ("Tab Amoxicillin", "Amoxicillin") is flagged once
+        known = frozenset(n for n in names if n in NAME_CLASSES)
+        key = known or names[0]
+        if key in seen:
+            continue
+        seen.add(key)
+
+        lit = next((literal[n] for n in _literal_candidates(drug) if n in literal), None)
+        if lit:
+            literal_hits.add(lit)
+            issues.append({"drug": drug, "level": "warning", "allergen": lit,
+                           "allergen_class": None, "cross_reactive": False,
+                           "message": f"{drug}: name matches listed allergy '{lit}' "
+                                      f"(not in the allergy knowledge base). Verify before use."})
+        classes = _classes(names, NAME_CLASSES)
+        for c in sorted(classes & allergic.keys()):
+            issues.append({"drug": drug, "level": "contraindicated", "allergen": allergic[c],
+                           "allergen_class": c, "cross_reactive": False,
+                           "message": f"{drug} is in class {CLASS_LABELS.get(c, c)}; "
+                                      f"patient lists allergy to {allergic[c]}. Avoid."})
+        for c in sorted(classes & cross.keys()):
+            src, risk = cross[c]
+            issues.append({"drug": drug, "level": CROSS_RISK_LEVEL.get(risk, "warning"),
+                           "allergen": allergic[src], "allergen_class": c, "cross_reactive": True,
+                           "message": f"{drug} ({CLASS_LABELS.get(c, c)}) has {risk} cross-reactivity with "
+                                      f"{CLASS_LABELS.get(src, src)} (allergy: {allergic[src]}). Use with caution."})
+
+    for a in dict.fromkeys(literal.values()):
+        if a not in literal_hits:
+            issues.append({"drug": None, "level": "info", "allergen": a,
+                           "allergen_class": None, "cross_reactive": False,
+                           "message": f"Allergy '{a}' is not in the allergy knowledge base and matched no "
+                                      f"drug name; it was not screened by drug class."})
+    return issues
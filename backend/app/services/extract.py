@@ -1,7 +1,10 @@
 # backend/app/services/extract.py
+import io
 import re
-from typing import List
+from functools import lru_cache
+from typing import Iterator, List, Optional
 from app.schemas import MedLine
+from app.services.dose_rules import DOSE_LIMITS
 
 # Optional: Hugging Face medical NER
 try:
@@ -21,71 +24,190 @@ FREQ_ABBREV_MAP = {
     "prn": None,  # as needed, leave None for frequency
 }
 
+# Known drug names used to score how plausible a parsed name is
+DRUG_LEXICON = sorted(set(DOSE_LIMITS) | {
+    "amoxicillin", "ampicillin", "penicillin", "cephalexin", "ceftriaxone", "azithromycin",
+    "ciprofloxacin", "doxycycline", "metronidazole", "paracetamol", "acetaminophen",
+    "naproxen", "diclofenac", "atorvastatin", "pravastatin", "rosuvastatin", "metformin",
+    "glimepiride", "insulin", "amlodipine", "lisinopril", "losartan", "metoprolol",
+    "atenolol", "furosemide", "hydrochlorothiazide", "clopidogrel", "apixaban",
+    "omeprazole", "pantoprazole", "ranitidine", "levothyroxine", "prednisolone",
+    "salbutamol", "cetirizine", "sulfamethoxazole", "trimethoprim", "tramadol",
+})
+
+# Confidence weights: regex match quality, lexicon similarity, NER agreement
+CONFIDENCE_WEIGHTS = (0.5, 0.3, 0.2)
+
+def _bigrams(word: str) -> frozenset:
+    return frozenset(word[i:i + 2] for i in range(len(word) - 1))
+
+LEXICON_SET = frozenset(DRUG_LEXICON)
+LEXICON_BIGRAMS = [_bigrams(drug) for drug in DRUG_LEXICON]
+# Lexicon similarity below this counts as no match
+SIMILARITY_CUTOFF = 0.6
+
+# Lines are parsed (and sent to NER as one batch) in chunks of this size
+CHUNK_LINES = 50
+
+# Entity groups treated as drugs; d4data/biomedical-ner-all tags them "Medication"
+NER_DRUG_LABELS = {"medication", "chemical", "drug"}
+
+MED_PATTERN = re.compile(
+    r"([A-Za-z]+(?:\s[A-Za-z]+)*)\s+(\d+(?:\.\d+)?)\s*(mg|g|mcg)\s*([A-Za-z0-9]+)?",
+    re.IGNORECASE
+)
+
 def clean_ocr_text(text: str) -> str:
     """Clean and normalize OCR text."""
     text = re.sub(r"[^a-zA-Z0-9\s\.\,\/\-]", " ", text)
     text = re.sub(r"\s+", " ", text).strip()
     return text
 
+def decode_frequency(freq_str: str) -> Optional[int]:
+    """Decode 'BD', 'TDS', '3x' etc. into doses per day."""
+    if freq_str in FREQ_ABBREV_MAP:
+        return FREQ_ABBREV_MAP[freq_str]
+    if freq_str.endswith("x"):  # e.g., "3x"
+        try:
+            return int(freq_str.replace("x", ""))
+        except ValueError:
+            return None
+    return None
+
 def regex_parse(text: str) -> List[dict]:
     """
     Extract meds with regex and decode frequency abbreviations.
     """
     meds = []
     # Match patterns like "Amoxicillin 500 mg BD" or "Paracetamol 650mg TDS"
-    pattern = re.compile(
-        r"([A-Za-z]+(?:\s[A-Za-z]+)*)\s+(\d+)\s*(mg|g|mcg)\s*([A-Za-z0-9]+)?",
-        re.IGNORECASE
-    )
-
-    for match in pattern.finditer(text):
-        name = match.group(1).strip()
-        strength = int(match.group(2))
-        unit = match.group(3).lower()
+    for match in MED_PATTERN.finditer(text):
         freq_str = (match.group(4) or "").lower()
-
-        # Decode abbreviation if in map
-        frequency = None
-        if freq_str in FREQ_ABBREV_MAP:
-            frequency = FREQ_ABBREV_MAP[freq_str]
-        elif freq_str.endswith("x"):  # e.g., "3x"
-            try:
-                frequency = int(freq_str.replace("x", ""))
-            except ValueError:
-                frequency = None
-
+        frequency = decode_frequency(freq_str)
+        strength = float(match.group(2))
         meds.append({
-            "name": name,
-            "strength": strength,
-            "unit": unit,
+            "name": match.group(1).strip(),
+            "strength": int(strength) if strength.is_integer() else strength,
+            "unit": match.group(3).lower(),
+            "frequency": freq_str or None,
             "frequency_per_day": frequency,
-            "route": "oral"
+            "route": "oral",
+            # name/strength/unit always match; full quality only with a recognised frequency
+            "match_quality": 1.0 if frequency is not None or freq_str == "prn" else 0.75,
         })
     return meds
 
-def ner_parse(text: str) -> List[dict]:
-    """Fallback to Hugging Face NER."""
-    if not ner_pipe:
-        return []
-    entities = ner_pipe(text)
+def _ner_meds(entities) -> List[dict]:
     meds = []
     for ent in entities:
-        if ent['entity_group'] in ["CHEMICAL", "DRUG"]:
+        if ent['entity_group'].lower() in NER_DRUG_LABELS:
             meds.append({
                 "name": ent['word'],
                 "strength": None,
                 "unit": None,
                 "frequency_per_day": None,
-                "route": None
+                "route": None,
+                "match_quality": 0.0,
             })
     return meds
 
+def ner_parse(text: str) -> List[dict]:
+    """Fallback to Hugging Face NER."""
+    if not ner_pipe:
+        return []
+    return _ner_meds(ner_pipe(text))
+
+def ner_parse_batch(lines: List[str]) -> List[List[dict]]:
+    """Run NER over many lines in one pipeline call; one result list per line."""
+    if not ner_pipe or not lines:
+        return [[] for _ in lines]
+    return [_ner_meds(entities) for entities in ner_pipe(lines, batch_size=CHUNK_LINES)]
+
+@lru_cache(maxsize=4096)
+def lexicon_similarity(name: str) -> float:
+    """Best similarity (0-1) between a parsed name and any lexicon entry."""
+    words = name.lower().split()
+    if not words:
+        return 0.0
+    # OCR lines often carry a form prefix ("Tab Amoxicillin"), so score each word too
+    candidates = [" ".join(words)] + words
+    if any(c in LEXICON_SET for c in candidates):
+        return 1.0
+    # Dice coefficient over character bigrams: plain set ops, cheap enough per name
+    best = 0.0
+    for c in candidates:
+        grams = _bigrams(c)
+        if not grams:
+            continue
+        for drug_grams in LEXICON_BIGRAMS:
+            best = max(best, 2 * len(grams & drug_grams) / (len(grams) + len(drug_grams)))
+    return best if best > SIMILARITY_CUTOFF else 0.0
+
+def ner_agreement(name: str, ner_names: Optional[List[str]]) -> Optional[float]:
+    """1.0 if NER also tagged this drug, 0.0 if not, None when NER is unavailable."""
+    if ner_names is None:
+        return None
+    lowered = name.lower()
+    return 1.0 if any(n in lowered or lowered in n for n in ner_names) else 0.0
+
+def score_confidence(match_quality: float, lexicon: float, ner: Optional[float]) -> float:
+    """Weighted blend of the three signals; NER weight is dropped when NER is off."""
+    w_regex, w_lex, w_ner = CONFIDENCE_WEIGHTS
+    if ner is None:
+        return round((w_regex * match_quality + w_lex * lexicon) / (w_regex + w_lex), 3)
+    return round(w_regex * match_quality + w_lex * lexicon + w_ner * ner, 3)
+
+def iter_lines(raw_text: str) -> Iterator[str]:
+    """Yield cleaned, non-empty lines, keeping the document's line structure."""
+    for line in io.StringIO(raw_text or ""):
+        line = clean_ocr_text(line)
+        if line:
+            yield line
+
+def parse_line(line: str, ner_hits: Optional[List[dict]] = None) -> List[MedLine]:
+    """
+    Parse a single cleaned line into scored MedLine objects. ner_hits are this
+    line's NER results if already computed in a batch; otherwise NER runs here.
+    """
+    meds = regex_parse(line)
+    ner_names = None
+    if ner_pipe:
+        if ner_hits is None:
+            ner_hits = ner_parse(line)
+        ner_names = [m["name"].lower() for m in ner_hits]
+        if not meds:
+            meds = [dict(m) for m in ner_hits]
+    out = []
+    for m in meds:
+        quality = m.pop("match_quality")
+        m["confidence"] = score_confidence(quality, lexicon_similarity(m["name"]),
+                                           ner_agreement(m["name"], ner_names))
+        m["drug"] = m.pop("name")
+        out.append(MedLine(raw=line, **m))
+    return out
+
+def _iter_chunks(lines: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_medlines(raw_text: str) -> Iterator[MedLine]:
+    """
+    Streaming extraction: yields MedLine objects line by line as they are parsed.
+    Lines are handled CHUNK_LINES at a time so NER gets one batched call per
+    chunk and only one chunk is held in memory.
+    """
+    for chunk in _iter_chunks(iter_lines(raw_text), CHUNK_LINES):
+        ner_batch = ner_parse_batch(chunk) if ner_pipe else [None] * len(chunk)
+        for line, ner_hits in zip(chunk, ner_batch):
+            yield from parse_line(line, ner_hits)
+
 def simple_parse_lines(raw_text: str) -> List[MedLine]:
     """
     Main extraction entry point.
     """
-    text = clean_ocr_text(raw_text)
-    meds = regex_parse(text)
-    if not meds:
-        meds = ner_parse(text)
-    return [MedLine(**m) for m in meds]
+    return list(iter_medlines(raw_text))
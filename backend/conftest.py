@@ -0,0 +1,3 @@
+# backend/conftest.py
+# Lives at backend/ so pytest puts this directory on sys.path and tests can
+# import the `app` package the same way uvicorn does (run pytest from backend/).
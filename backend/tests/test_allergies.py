@@ -0,0 +1,90 @@
+# backend/tests/test_allergies.py
+import pytest
+from app.schemas import MedLine
+from app.services.allergies import screen_allergies
+
+
+def meds(*drugs):
+    return [MedLine(raw=d, drug=d) for d in drugs]
+
+
+def levels(issues):
+    return {(i["drug"], i["level"]) for i in issues}
+
+
+def test_no_allergies_no_issues():
+    assert screen_allergies(meds("Amoxicillin"), []) == []
+
+
+@pytest.mark.parametrize("allergy", ["Penicillin", "penicillin allergy", "Penicillin (rash)", "PCN"])
+def test_direct_class_hit(allergy):
+    issues = screen_allergies(meds("Tab Amoxicillin", "Warfarin"), [allergy])
+    assert levels(issues) == {("Tab Amoxicillin", "contraindicated")}
+    assert issues[0]["allergen_class"] == "penicillins"
+    assert issues[0]["allergen"] == allergy
+
+
+def test_brand_resolves_to_ingredient_class():
+    issues = screen_allergies(meds("Augmentin", "Advil"), ["penicillin", "ibuprofen"])
+    assert levels(issues) == {("Augmentin", "contraindicated"), ("Advil", "contraindicated")}
+
+
+@pytest.mark.parametrize("allergy", ["beta-lactam", "Beta lactam allergy", "beta-lactams (anaphylaxis)"])
+def test_beta_lactam_group_covers_all_member_classes(allergy):
+    issues = screen_allergies(meds("Amoxicillin", "Cephalexin", "Meropenem"), [allergy])
+    assert levels(issues) == {("Amoxicillin", "contraindicated"), ("Cephalexin", "contraindicated"),
+                              ("Meropenem", "contraindicated")}
+    assert not any(i["cross_reactive"] for i in issues)
+
+
+def test_cross_reactive_level_follows_risk():
+    issues = screen_allergies(meds("Ceftriaxone", "Naproxen"), ["Penicillin", "Aspirin"])
+    by_drug = {i["drug"]: i for i in issues}
+    assert by_drug["Ceftriaxone"]["level"] == "info"
+    assert by_drug["Ceftriaxone"]["cross_reactive"] is True
+    assert by_drug["Naproxen"]["level"] == "warning"
+    assert by_drug["Naproxen"]["allergen"] == "Aspirin"
+
+
+def test_hyphenated_allergy_is_split_into_ingredients():
+    issues = screen_allergies(meds("Amoxicillin Clavulanate"), ["amoxicillin-clavulanate"])
+    assert levels(issues) == {("Amoxicillin Clavulanate", "contraindicated")}
+
+
+def test_hyphenated_kb_key_still_matches_whole():
+    issues = screen_allergies(meds("Co-Amoxiclav"), ["penicillin"])
+    assert levels(issues) == {("Co-Amoxiclav", "contraindicated")}
+
+
+def test_combination_product_screens_every_ingredient():
+    issues = screen_allergies(meds("Codeine Ibuprofen"), ["ibuprofen"])
+    assert levels(issues) == {("Codeine Ibuprofen", "contraindicated")}
+    assert issues[0]["allergen_class"] == "nsaids"
+
+
+def test_duplicate_lines_flagged_once():
+    issues = screen_allergies(meds("Tab Amoxicillin", "Amoxicillin", "amoxicillin"), ["Penicillin"])
+    assert len(issues) == 1
+
+
+def test_single_ingredient_line_does_not_hide_later_combination():
+    issues = screen_allergies(meds("Codeine", "Codeine Ibuprofen"), ["ibuprofen"])
+    assert levels(issues) == {("Codeine Ibuprofen", "contraindicated")}
+
+
+def test_unknown_allergy_literal_match_is_a_warning_without_info():
+    issues = screen_allergies(meds("Tab Lisinopril"), ["Lisinopril (cough)"])
+    assert levels(issues) == {("Tab Lisinopril", "warning")}
+
+
+def test_unknown_allergy_without_match_is_reported():
+    issues = screen_allergies(meds("Warfarin"), ["latex"])
+    assert len(issues) == 1
+    assert issues[0]["level"] == "info" and issues[0]["drug"] is None
+    assert issues[0]["allergen"] == "latex"
+
+
+@pytest.mark.parametrize("drug,allergy", [("Castor oil", "peanut oil"), ("Sodium Valproate", "sodium")])
+def test_unknown_allergy_does_not_match_on_a_shared_word(drug, allergy):
+    issues = screen_allergies(meds(drug), [allergy])
+    assert levels(issues) == {(None, "info")}
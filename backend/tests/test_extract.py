@@ -0,0 +1,73 @@
+# backend/tests/test_extract.py
+import pytest
+from app.services import extract
+
+
+def fake_ner(drugs, label="Medication"):
+    """Stand-in for the HF pipeline: tags any word in `drugs` with `label`."""
+    calls = []
+
+    def pipe(inputs, batch_size=None):
+        calls.append((inputs, batch_size))
+
+        def tag(line):
+            return [{"entity_group": label, "word": w} for w in line.lower().split() if w in drugs]
+        if isinstance(inputs, list):
+            return [tag(line) for line in inputs]
+        return tag(inputs)
+    pipe.calls = calls
+    return pipe
+
+
+@pytest.fixture
+def no_ner(monkeypatch):
+    monkeypatch.setattr(extract, "ner_pipe", None)
+
+
+def test_lines_are_parsed_separately(no_ner):
+    meds = extract.simple_parse_lines("Amoxicillin 500 mg BD\nParacetamol 650mg TDS\n")
+    assert [(m.drug, m.strength, m.frequency_per_day) for m in meds] == [
+        ("Amoxicillin", 500, 2), ("Paracetamol", 650, 3)]
+    assert meds[0].raw == "Amoxicillin 500 mg BD"
+
+
+def test_trailing_word_ending_in_x_is_not_a_frequency(no_ner):
+    full, = extract.regex_parse("Amoxicillin 500 mg 3x")
+    boxed, = extract.regex_parse("Amoxicillin 500 mg box")
+    assert full["match_quality"] == 1.0 and full["frequency_per_day"] == 3
+    assert boxed["match_quality"] == 0.75 and boxed["frequency_per_day"] is None
+
+
+def test_confidence_without_ner_drops_ner_weight(no_ner):
+    med, = extract.simple_parse_lines("Amoxicillin 500 mg BD")
+    assert med.confidence == 1.0
+
+
+def test_confidence_with_agreeing_ner(monkeypatch):
+    monkeypatch.setattr(extract, "ner_pipe", fake_ner({"amoxicillin"}))
+    med, = extract.simple_parse_lines("Amoxicillin 500 mg BD")
+    assert med.confidence == 1.0
+
+
+def test_confidence_with_disagreeing_ner(monkeypatch):
+    monkeypatch.setattr(extract, "ner_pipe", fake_ner(set()))
+    med, = extract.simple_parse_lines("Amoxicillin 500 mg BD")
+    w_regex, w_lex, _ = extract.CONFIDENCE_WEIGHTS
+    assert med.confidence == pytest.approx(w_regex + w_lex)
+
+
+@pytest.mark.parametrize("label", ["Medication", "CHEMICAL", "DRUG"])
+def test_ner_fallback_accepts_model_labels(monkeypatch, label):
+    monkeypatch.setattr(extract, "ner_pipe", fake_ner({"warfarin"}, label=label))
+    med, = extract.simple_parse_lines("continue warfarin as before")
+    assert med.drug == "warfarin"
+
+
+def test_ner_is_batched_per_chunk(monkeypatch):
+    pipe = fake_ner({"amoxicillin"})
+    monkeypatch.setattr(extract, "ner_pipe", pipe)
+    n = extract.CHUNK_LINES + 1
+    meds = extract.simple_parse_lines("Amoxicillin 500 mg BD\n" * n)
+    assert len(meds) == n
+    assert [(len(lines), bs) for lines, bs in pipe.calls] == [
+        (extract.CHUNK_LINES, extract.CHUNK_LINES), (1, extract.CHUNK_LINES)]
@@ -3,11 +3,69 @@ import streamlit as st
 import requests
 import pandas as pd
 import json
+import uuid
+from requests.adapters import HTTPAdapter
 
 API_BASE = st.secrets.get("api_base", "http://localhost:8000")
+HISTORY_PAGE_SIZES = [10, 25, 50, 100]
+# Extraction results hold prescription text/images, so keep them short-lived
+EXTRACT_CACHE_TTL = 120
+
+
+class UncachedExtraction(Exception):
+    """Raised from a cached call so an empty or failed /extract result is not cached."""
+    def __init__(self, result):
+        super().__init__(result.get("error") or "No medications extracted")
+        self.result = result
+
+
+def _check_extraction(ex):
+    if ex.get("error") or not ex.get("meds"):
+        raise UncachedExtraction(ex)
+    return ex
+
+
+@st.cache_resource
+def get_session():
+    """One pooled keep-alive session shared across reruns and users."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_history(name: str, offset: int, limit: int):
+    """
+    Fetch one page of history. Asks for one extra record so we know whether
+    a next page exists without counting the whole table.
+    """
+    r = get_session().get(f"{API_BASE}/history/{name}",
+                          params={"offset": offset, "limit": limit + 1}, timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+# session_id is part of the cache key so one user's prescriptions never serve another's
+@st.cache_data(ttl=EXTRACT_CACHE_TTL, max_entries=64, show_spinner=False)
+def extract_text(text: str, session_id: str):
+    r = get_session().post(f"{API_BASE}/extract", data={"text": text}, timeout=30)
+    r.raise_for_status()
+    return _check_extraction(r.json())
+
+
+@st.cache_data(ttl=EXTRACT_CACHE_TTL, max_entries=64, show_spinner=False)
+def extract_file(content: bytes, mime_type: str, session_id: str):
+    files = {"file": ("prescription", content, mime_type)}
+    r = get_session().post(f"{API_BASE}/extract", files=files, timeout=60)
+    r.raise_for_status()
+    return _check_extraction(r.json())
+
 
 st.set_page_config(page_title="AI Medical Prescription Verification", layout="wide")
 st.title("AI Medical Prescription Verification — Clinician Dashboard")
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
 
 # Sidebar patient info + history lookup
 with st.sidebar:
@@ -25,20 +83,9 @@ with st.sidebar:
         if not history_query.strip():
             st.warning("Enter a patient name to search history.")
         else:
-            try:
-                r = requests.get(f"{API_BASE}/history/{history_query}")
-                if r.status_code == 200:
-                    hist = r.json()
-                    if hist:
-                        st.success(f"Found {len(hist)} records for '{history_query}'. Scroll in main UI.")
-                        st.session_state["history_loaded"] = hist
-                    else:
-                        st.info("No history found.")
-                        st.session_state["history_loaded"] = []
-                else:
-                    st.error("History lookup failed: " + r.text)
-            except Exception as e:
-                st.error("Could not contact backend: " + str(e))
+            # Only remember the query here; pages are fetched lazily when rendered
+            st.session_state["history_query"] = history_query.strip()
+            st.session_state["history_page"] = 0
 
 # Main layout: left input / right results
 col1, col2 = st.columns([1, 1.2])
@@ -51,15 +98,17 @@ with col1:
     if st.button("Run OCR & Extract"):
         st.info("Calling /extract...")
         try:
-            if uploaded:
-                files = {"file": ("prescription", uploaded.getvalue(), uploaded.type)}
-                resp = requests.post(f"{API_BASE}/extract", files=files, timeout=60)
-            else:
-                resp = requests.post(f"{API_BASE}/extract", data={"text": plain_text}, timeout=30)
-            if resp.status_code != 200:
-                st.error("Extraction failed: " + resp.text)
+            with st.spinner("Extracting..."):
+                try:
+                    if uploaded:
+                        ex = extract_file(uploaded.getvalue(), uploaded.type, session_id)
+                    else:
+                        ex = extract_text(plain_text, session_id)
+                except UncachedExtraction as e:
+                    ex = e.result
+            if ex.get("error"):
+                st.error("Extraction failed: " + ex["error"])
             else:
-                ex = resp.json()
                 st.session_state["ocr_text"] = ex.get("raw_text", "") or ex.get("ocr_text", "") or plain_text
                 meds = ex.get("meds", []) or ex.get("meds_raw", []) or []
                 # convert meds to DataFrame for editing
@@ -69,6 +118,8 @@ with col1:
                     df = pd.DataFrame(columns=["drug","strength","unit","frequency_per_day","route"])
                 st.session_state["meds_df"] = df
                 st.success("Extraction complete. Edit meds if necessary and click Verify.")
+        except requests.HTTPError as e:
+            st.error("Extraction failed: " + e.response.text)
         except Exception as e:
             st.error("Error calling /extract: " + str(e))
 
@@ -91,12 +142,13 @@ with col1:
         }
         st.json(payload)
         try:
-            r = requests.post(f"{API_BASE}/analyze", json=payload, timeout=60)
+            r = get_session().post(f"{API_BASE}/analyze", json=payload, timeout=60)
             if r.status_code != 200:
                 st.error("Analysis failed: " + r.text)
             else:
                 out = r.json()
                 st.session_state["last_analysis"] = {"payload": payload, "result": out}
+                fetch_history.clear()
                 st.success("Analysis complete and saved to history.")
                 # display results immediately in right column by setting state
                 st.rerun()
@@ -126,6 +178,13 @@ with col2:
         else:
             st.success("✅ No dose issues detected.")
 
+        st.markdown("**Allergy Issues**")
+        if out.get("allergy_issues"):
+            for a in out.get("allergy_issues"):
+                st.markdown(f"- **{a.get('drug') or a.get('allergen', '')}** ({a.get('level')}): {a.get('message')}")
+        else:
+            st.success("✅ No allergy conflicts detected.")
+
         st.markdown("**Interactions**")
         if out.get("interactions"):
             for it in out.get("interactions"):
@@ -144,20 +203,51 @@ with col2:
 
     st.markdown("---")
     st.subheader("Patient History (loaded)")
-    history = st.session_state.get("history_loaded", [])
-    if history:
-        for rec in history:
-            st.markdown(f"**Date:** {rec.get('date')}  —  **Patient:** {rec.get('patient_name')}")
-            st.markdown("- **Medications**")
-            st.json(rec.get("meds"))
-            st.markdown("- **Dose Issues**")
-            st.write(rec.get("dose_issues") or "None")
-            st.markdown("- **Interactions**")
-            st.write(rec.get("interactions") or "None")
-            st.markdown("- **Alternatives**")
-            st.write(rec.get("alternatives") or "None")
-            st.markdown("---")
+    history_query = st.session_state.get("history_query")
+    if history_query:
+        nav1, nav2, nav3 = st.columns([1, 1, 2])
+        page_size = nav3.selectbox("Records per page", HISTORY_PAGE_SIZES, index=1, key="history_page_size",
+                                  on_change=lambda: st.session_state.update(history_page=0))
+        page = st.session_state.get("history_page", 0)
+        try:
+            hist = fetch_history(history_query, page * page_size, page_size)
+        except Exception as e:
+            st.error("History lookup failed: " + str(e))
+            hist = []
+        has_next = len(hist) > page_size
+        hist = hist[:page_size]
+
+        if nav1.button("◀ Prev", disabled=page == 0):
+            st.session_state["history_page"] = page - 1
+            st.rerun()
+        if nav2.button("Next ▶", disabled=not has_next):
+            st.session_state["history_page"] = page + 1
+            st.rerun()
+
+        if hist:
+            st.caption(f"'{history_query}' — records {page * page_size + 1}–{page * page_size + len(hist)}")
+            # st.dataframe is virtualized, so the summary stays cheap to draw
+            st.dataframe(pd.DataFrame([{
+                "date": rec.get("date"),
+                "patient": rec.get("patient_name"),
+                "meds": len(rec.get("meds") or []),
+                "dose_issues": len(rec.get("dose_issues") or []),
+                "interactions": len(rec.get("interactions") or []),
+            } for rec in hist]), use_container_width=True, hide_index=True, height=240)
+            # Details are drawn only for the current page, collapsed by default
+            for rec in hist:
+                with st.expander(f"{rec.get('date')}  —  {rec.get('patient_name')}"):
+                    st.markdown("- **Medications**")
+                    st.dataframe(pd.DataFrame(rec.get("meds") or []), use_container_width=True, hide_index=True)
+                    st.markdown("- **Dose Issues**")
+                    st.write(rec.get("dose_issues") or "None")
+                    st.markdown("- **Interactions**")
+                    st.write(rec.get("interactions") or "None")
+                    st.markdown("- **Alternatives**")
+                    st.write(rec.get("alternatives") or "None")
+        elif page == 0:
+            st.info("No history found.")
+        else:
+            st.info("No more records.")
     else:
         st.write("No history loaded. Use the sidebar to search a patient's history.")
-
-